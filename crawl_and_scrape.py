@@ -1,13 +1,9 @@
 import os
-import urllib
 import zipfile
 
-from bs4 import BeautifulSoup
-import requests
 import csv
 import time
 import re
-import pandas as pd
 import math
 
 # Hard coded parameters for president/secretary visits and pre-exising datasets
@@ -39,8 +35,22 @@ DIPLOMATIC_DATA_FNAME = DIPLOMATIC_DATA_LINK.split('/')[-1]
 ECONOMIC_DATA_FNAME = "pwt1001.dta"
 POWER_DATA_FNAME = "NMC-60-abridged.csv"
 
-# download pre-exising datasets
-if not os.path.exists(DATA_FOLDER):
+
+def download_datasets():
+    """
+    Download the pre-existing datasets (country codes, diplomatic exchange,
+    economic and power data) into the data folder, unless it already exists.
+
+    Inputs: None
+
+    Returns: None
+    """
+    if os.path.exists(DATA_FOLDER):
+        return
+
+    import urllib.request
+    import requests
+
     # create directory to store data
     os.mkdir(DATA_FOLDER)
     for link, fname in zip([COUNTRY_CODES_LINK, DIPLOMATIC_DATA_LINK,
@@ -56,7 +66,7 @@ if not os.path.exists(DATA_FOLDER):
                                f'{DATA_FOLDER}{POWER_DATA_ZIPFILE}')
 
     # extract zip power data in data folder
-    with zipfile.ZipFile(POWER_DATA_ZIPFILE, 'r') as zip_ref:
+    with zipfile.ZipFile(f'{DATA_FOLDER}{POWER_DATA_ZIPFILE}', 'r') as zip_ref:
         zip_ref.extractall(DATA_FOLDER)
 
     # extract again the unzipped files
@@ -66,13 +76,37 @@ if not os.path.exists(DATA_FOLDER):
         with zipfile.ZipFile(f'{DATA_FOLDER}{zip_file}', 'r') as zip_ref:
             zip_ref.extractall(DATA_FOLDER)
 
-# COW mapping from country to code and code to country
-with open(f"{DATA_FOLDER}{COW_COUNTRY_CODES_FNAME}", 'r') as f:
-    COUNTRIES_TO_CODES_DICT = {row['StateNme']: int(row['CCode'])
-                               for row in csv.DictReader(f)}
-    CODES_TO_COUNTRIES_DICT = {val: k
-                               for k, val in
-                               COUNTRIES_TO_CODES_DICT.items()}
+
+def load_country_codes():
+    """
+    Load the COW mappings from country to code and code to country,
+    downloading the datasets first if needed.
+
+    Inputs: None
+
+    Returns:
+        (tuple) dicts mapping countries to codes and codes to countries
+    """
+    download_datasets()
+    with open(f"{DATA_FOLDER}{COW_COUNTRY_CODES_FNAME}", 'r') as f:
+        countries_to_codes_dict = {row['StateNme']: int(row['CCode'])
+                                   for row in csv.DictReader(f)}
+    codes_to_countries_dict = {val: k
+                               for k, val in countries_to_codes_dict.items()}
+    return countries_to_codes_dict, codes_to_countries_dict
+
+
+def __getattr__(name):
+    """
+    Lazily load COUNTRIES_TO_CODES_DICT and CODES_TO_COUNTRIES_DICT on first
+    access, so that importing this module does not touch the data folder.
+    """
+    if name in ('COUNTRIES_TO_CODES_DICT', 'CODES_TO_COUNTRIES_DICT'):
+        countries_to_codes_dict, codes_to_countries_dict = load_country_codes()
+        globals().update(COUNTRIES_TO_CODES_DICT=countries_to_codes_dict,
+                         CODES_TO_COUNTRIES_DICT=codes_to_countries_dict)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_travel_info(url_header, url_body, url, csv_filename):
@@ -117,6 +151,9 @@ def obtain_soup(url):
     Returns:
          (BeatifulSoup) The parsed "soup" obtained by bs4
     """
+    import requests
+    from bs4 import BeautifulSoup
+
     request = requests.get(url, headers=
     {'User-Agent': 'scraper for teaching bitsikokos@uchicago.edu'})
     request = request.text
@@ -190,6 +227,8 @@ def add_year_columns(csv_filename):
     Returns:
         None
     """
+    import pandas as pd
+
     dataset = pd.read_csv(csv_filename)
     dataset['year'] = dataset['time'].apply(lambda x:
                                             int(re.findall(r'\d{4}', x)[0])
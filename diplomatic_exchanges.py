@@ -1,17 +1,11 @@
-import jellyfish
-import networkx as nx
-import pandas as pd
+import os
 import sqlite3
 import warnings
 
-from sklearn.preprocessing import MinMaxScaler
-
-from crawl_and_scrape import DATA_FOLDER, COUNTRIES_TO_CODES_DICT, \
-    PRESIDENT_VISITS_FNAME, ECONOMIC_DATA_FNAME, DIPLOMATIC_DATA_FNAME, \
-    POWER_DATA_FNAME
-
-warnings.filterwarnings("ignore")
-import os
+# heavy libraries (pandas, numpy, networkx, jellyfish) are imported in the
+# functions that use them, so that importing this module stays fast
+from crawl_and_scrape import DATA_FOLDER, PRESIDENT_VISITS_FNAME, \
+    ECONOMIC_DATA_FNAME, DIPLOMATIC_DATA_FNAME, POWER_DATA_FNAME
 
 # SQl table names and database name
 DIPLOMATIC_DATA_TABLE_NAME = "diplomatic_exchanges"
@@ -47,7 +41,8 @@ def dump_dataframe_to_db(conn, df, name):
 
 def normalize_dataframe(df):
     """
-    Normalize dataframe using a MinMax scaler
+    Normalize each column of a dataframe to [0, 1] (min-max scaling).
+    Constant columns are mapped to 0.
 
     Inputs:
         - df (pandas.DataFrame) dataframe
@@ -55,10 +50,15 @@ def normalize_dataframe(df):
     Returns:
         (pandas.DataFrame) the normalized dataframe
     """
-    columns = df.columns
-    scaler = MinMaxScaler()
-    scaler.fit(df.values)
-    return pd.DataFrame(scaler.transform(df.values), columns=columns)
+    import numpy as np
+    import pandas as pd
+
+    values = df.to_numpy(dtype=np.float64)
+    column_min = np.nanmin(values, axis=0)
+    column_range = np.nanmax(values, axis=0) - column_min
+    column_range[column_range < 10 * np.finfo(np.float64).eps] = 1.0
+    return pd.DataFrame((values - column_min) / column_range,
+                        columns=df.columns)
 
 
 def compute_centrality_measures(G_per_year, year):
@@ -74,6 +74,9 @@ def compute_centrality_measures(G_per_year, year):
         (pandas.DataFrame) a pandas Dataframe containing the centrality measures
                            node id and year
     """
+    import networkx as nx
+    import pandas as pd
+
     page_rank_scores_dict = nx.pagerank(G_per_year, weight='DR_at_2')
     katz_dict = nx.katz_centrality_numpy(G_per_year, weight='DR_at_2')
     eigen_dict = nx.eigenvector_centrality(G_per_year.to_undirected(),
@@ -140,23 +143,57 @@ def add_centrality_measures_to_db_for_year(conn, year, centrality_table_name,
     dump_dataframe_to_db(conn, df_centralities, name=centrality_table_name)
 
 
-def get_centrality_measures(year):
+def get_centrality_measures(year, conn=None):
     """
     Once in db get for a year
+
+    Inputs:
+        - year (int) the given year
+        - conn (sqlite3.Connection) optional open connection to database,
+                                    if None a new connection is opened
+
+    Returns:
+        (pandas.DataFrame) the centrality measures of all countries
     """
-    conn = sqlite3.connect(DATABASE_NAME)
+    import pandas as pd
+
+    close_conn = conn is None
+    if close_conn:
+        conn = sqlite3.connect(DATABASE_NAME)
     q = f'SELECT * FROM all_centralities ac WHERE ac."year"={year};'
     cur = conn.cursor()
     df = pd.read_sql(q, conn)
     cur.close()
-    conn.close()
+    if close_conn:
+        conn.close()
     return df
 
 
+def get_country_centrality_measures(conn, ccode):
+    """
+    Get the centrality measures of a country for all years.
+
+    Inputs:
+        - conn (sqlite3.Connection) connection to database
+        - ccode (int) country code
+
+    Returns:
+        (pandas.DataFrame) the centrality measures sorted by year
+    """
+    import pandas as pd
+
+    q = f"""SELECT * FROM {CENTRALITIES_TABLE_NAME} ac
+            WHERE ac.node_id={ccode} ORDER BY ac."year";"""
+    return pd.read_sql(q, conn)
+
+
 def get_diplomatic_graph(conn, year):
     """
     Once in db get a graph object
     """
+    import networkx as nx
+    import pandas as pd
+
     q = f""" SELECT *  FROM {DIPLOMATIC_DATA_TABLE_NAME} de 
              WHERE DE=1 AND DR_at_1 = 3 AND year ={year} AND DR_at_2 != 9
          """
@@ -187,6 +224,8 @@ def create_all_centrality_measure_tables(conn, diplomatic_exchanges, to_csv):
 
     Returns: None
     """
+    import pandas as pd
+
     years = sorted(set(diplomatic_exchanges["year"].values))
     centrality_table_names = []
     for year in years:
@@ -221,6 +260,9 @@ def match_countries(target_countries, known_mismatches_corrected):
     Returns
         (dict) mapping from countries to coutnry codes
     """
+    import jellyfish
+    from crawl_and_scrape import COUNTRIES_TO_CODES_DICT
+
     known_countries = set(COUNTRIES_TO_CODES_DICT.keys())
     countries_to_codes_dict = {target_country:
                                    COUNTRIES_TO_CODES_DICT[target_country]
@@ -246,6 +288,8 @@ def add_presidential_visits(conn):
 
     Returns: None
     """
+    import pandas as pd
+
     president_visits = pd.read_csv(f"{DATA_FOLDER}{PRESIDENT_VISITS_FNAME}")
 
     scraped_countries = set(president_visits['destination country'].values)
@@ -284,6 +328,8 @@ def add_economic_data(conn):
 
     Returns: None
     """
+    import pandas as pd
+
     economic_data = pd.read_stata(f"{DATA_FOLDER}{ECONOMIC_DATA_FNAME}")
 
     economic_data_countries = set(economic_data['country'].values)
@@ -394,22 +440,30 @@ def populate_db(to_csv=True):
 
     Returns: None
     """
+    import pandas as pd
+
     conn = sqlite3.connect(DATABASE_NAME)
 
-    diplomatic_exchanges = pd.read_csv(f"{DATA_FOLDER}{DIPLOMATIC_DATA_FNAME}")
-    dump_dataframe_to_db(conn, diplomatic_exchanges,
-                         name=DIPLOMATIC_DATA_TABLE_NAME)
+    # silence pandas/networkx warnings while building the database only
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
 
-    power_data = pd.read_csv(f"{DATA_FOLDER}{POWER_DATA_FNAME}")
-    dump_dataframe_to_db(conn, power_data, 'power_data')
+        diplomatic_exchanges = pd.read_csv(
+            f"{DATA_FOLDER}{DIPLOMATIC_DATA_FNAME}")
+        dump_dataframe_to_db(conn, diplomatic_exchanges,
+                             name=DIPLOMATIC_DATA_TABLE_NAME)
 
-    create_all_centrality_measure_tables(conn, diplomatic_exchanges, to_csv)
+        power_data = pd.read_csv(f"{DATA_FOLDER}{POWER_DATA_FNAME}")
+        dump_dataframe_to_db(conn, power_data, 'power_data')
 
-    add_presidential_visits(conn)
+        create_all_centrality_measure_tables(conn, diplomatic_exchanges,
+                                             to_csv)
 
-    add_economic_data(conn)
+        add_presidential_visits(conn)
 
-    set_foreign_keys(conn)
+        add_economic_data(conn)
+
+        set_foreign_keys(conn)
 
     conn.commit()
     conn.close()
@@ -465,6 +519,8 @@ def get_data_for_regression(conn, year):
         (pandas.DataFrame) the dataframe containing
                            all the matched info on visits
     """
+    import pandas as pd
+
     q = f"""
         -- connect president visits with centralities and econ measures
         select * from all_centralities ac 
@@ -0,0 +1,116 @@
+"""
+Load test for the local query service (see query_service.py).
+
+Opens concurrent keep-alive client connections that repeatedly request a set
+of endpoints for a fixed duration, then reports the throughput (requests/sec)
+and latency percentiles.
+
+Usage:
+    >> python query_service.py --port 8000 &
+    >> python load_test.py --port 8000 --concurrency 32 --duration 10
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+
+DEFAULT_TARGETS = ['/centralities?year=2005',
+                   '/centralities?ccode=2',
+                   '/regression?year=2005&columns=pagerank,rgdpe',
+                   '/edges?year=2005&ccode=2&k=1',
+                   '/edges?year=2005&top=10&measure=katz']
+
+
+async def run_client(host, port, targets, deadline, latencies, errors):
+    """
+    Send requests over one keep-alive connection until the deadline,
+    recording the latency of each request.
+
+    Inputs:
+        - host (str) host of the service
+        - port (int) port of the service
+        - targets (iterator) request targets to cycle through
+        - deadline (float) time.perf_counter() value to stop at
+        - latencies (list) latencies in seconds, appended to
+        - errors (collections.Counter-like dict) status counts of failed
+                                                 requests, updated
+
+    Returns: None
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            target = next(targets)
+            start = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n"
+                         .encode('latin-1'))
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            status = int(lines[0].split(' ')[1])
+            length = next(int(line.split(':')[1]) for line in lines[1:]
+                          if line.lower().startswith('content-length:'))
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors[status] = errors.get(status, 0) + 1
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def load_test(host, port, targets, concurrency, duration):
+    """
+    Run concurrent clients against the service.
+
+    Inputs:
+        - host (str) host of the service
+        - port (int) port of the service
+        - targets (list) request targets
+        - concurrency (int) number of concurrent connections
+        - duration (float) duration of the test in seconds
+
+    Returns:
+        (tuple) list of latencies, dict of error counts by status and the
+                elapsed time in seconds
+    """
+    latencies, errors = [], {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*[
+        run_client(host, port, itertools.cycle(targets[i % len(targets):]
+                                               + targets[:i % len(targets)]),
+                   deadline, latencies, errors)
+        for i in range(concurrency)])
+    return latencies, errors, time.perf_counter() - start
+
+
+def report(latencies, errors, elapsed):
+    """
+    Print throughput and latency percentiles.
+    """
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"requests:      {len(latencies)} in {elapsed:.1f} s")
+    print(f"errors:        {errors if errors else 0}")
+    print(f"requests/sec:  {len(latencies) / elapsed:.1f}")
+    print(f"latency p50:   {quantiles[49] * 1e3:.2f} ms")
+    print(f"latency p99:   {quantiles[98] * 1e3:.2f} ms")
+    print(f"latency max:   {max(latencies) * 1e3:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('targets', nargs='*', default=DEFAULT_TARGETS,
+                        help="request targets, e.g. /centralities?year=2005")
+    args = parser.parse_args()
+    report(*asyncio.run(load_test(args.host, args.port, args.targets,
+                                  args.concurrency, args.duration)))
+
+
+if __name__ == "__main__":
+    main()
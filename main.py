@@ -1,8 +1,11 @@
-from crawl_and_scrape import get_travel_info, HEADER, BODY_PRESIDENT, \
-    URL_PRESIDENT, OUT_FILE_PRESIDENT, BODY_SECRETARY, URL_SECRETARY, \
-    OUT_FILE_SECRETARY, add_year_columns
+from crawl_and_scrape import download_datasets, get_travel_info, HEADER, \
+    BODY_PRESIDENT, URL_PRESIDENT, OUT_FILE_PRESIDENT, BODY_SECRETARY, \
+    URL_SECRETARY, OUT_FILE_SECRETARY, add_year_columns
 from diplomatic_exchanges import drop_all_tables, populate_db
 
+# download pre-existing datasets
+download_datasets()
+
 # scrape data on presidential visits
 get_travel_info(HEADER, BODY_PRESIDENT, URL_PRESIDENT, OUT_FILE_PRESIDENT)
 get_travel_info(HEADER, BODY_SECRETARY, URL_SECRETARY, OUT_FILE_SECRETARY)
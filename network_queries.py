@@ -0,0 +1,395 @@
+import numpy as np
+
+from diplomatic_exchanges import DIPLOMATIC_DATA_TABLE_NAME
+
+# edge directions supported by the neighborhood queries
+DIRECTIONS = ('out', 'in', 'both')
+
+
+class AdjacencyIndex:
+    """
+    Compressed sparse row (CSR) adjacency index of the diplomatic graph of a
+    single year.
+
+    Nodes are country codes (ccode) kept in sorted order, so that a ccode is
+    mapped to its row with a binary search. Both the out-edges (rows are
+    senders) and the in-edges (rows are receivers) are indexed, so that
+    neighborhoods in either direction are slices of contiguous arrays.
+
+    Edges are returned as a tuple of numpy arrays (sources, targets, weights)
+    with sources and targets given as country codes and weights being the
+    DR_at_2 level of representation.
+    """
+
+    def __init__(self, year, sources, targets, weights):
+        """
+        Build the index from the edge list of a year.
+
+        Inputs:
+            - year (int) the year of the graph
+            - sources (array-like) ccode of the sending country of each edge
+            - targets (array-like) ccode of the receiving country of each edge
+            - weights (array-like) DR_at_2 value of each edge
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+
+        self.year = year
+        self.nodes = np.union1d(sources, targets)
+        src = np.searchsorted(self.nodes, sources)
+        dst = np.searchsorted(self.nodes, targets)
+
+        # repeated (source, target) pairs keep their last weight,
+        # as in nx.from_pandas_edgelist
+        keys = src * len(self.nodes) + dst
+        _, last = np.unique(keys[::-1], return_index=True)
+        keep = np.sort(len(keys) - 1 - last)
+        src, dst, weights = src[keep], dst[keep], weights[keep]
+
+        self._out = _build_csr(src, dst, weights, len(self.nodes))
+        self._in = _build_csr(dst, src, weights, len(self.nodes))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def n_edges(self):
+        """
+        Number of (directed) edges in the graph.
+        """
+        return len(self._out[1])
+
+    def __contains__(self, ccode):
+        return self._positions([ccode], strict=False).size > 0
+
+    def edges(self):
+        """
+        All edges of the graph.
+
+        Returns:
+            (tuple) arrays of sources, targets and weights
+        """
+        return self._gather_edges(np.arange(len(self.nodes)), 'out')
+
+    def neighbors(self, ccodes, direction='out'):
+        """
+        Neighbors of one or more countries.
+
+        Inputs:
+            - ccodes (int or array-like) country code(s)
+            - direction (str) 'out' for countries receiving diplomats from
+                              ccodes, 'in' for countries sending diplomats to
+                              ccodes, 'both' for the union of the two
+
+        Returns:
+            (numpy.ndarray) sorted country codes of the neighbors
+        """
+        rows = self._positions(np.atleast_1d(ccodes))
+        return self.nodes[self._neighbor_rows(rows, direction)]
+
+    def ego_network(self, ccode, k=1, direction='out'):
+        """
+        k-hop ego network of a country.
+
+        The ego network contains every country reachable from ccode in at
+        most k hops following the given direction, and every edge of the
+        year graph between those countries.
+
+        Inputs:
+            - ccode (int) country code of the ego
+            - k (int) number of hops
+            - direction (str) 'out', 'in' or 'both'
+
+        Returns:
+            (tuple) arrays of sources, targets and weights
+        """
+        rows = self._positions([ccode])
+        visited = np.zeros(len(self.nodes), dtype=bool)
+        visited[rows] = True
+        frontier = rows
+        for _ in range(k):
+            if not frontier.size:
+                break
+            reached = self._neighbor_rows(frontier, direction)
+            frontier = reached[~visited[reached]]
+            visited[frontier] = True
+        return self._induced_edges(np.flatnonzero(visited))
+
+    def induced_subgraph(self, ccodes):
+        """
+        Edges of the graph between the given countries only.
+
+        Inputs:
+            - ccodes (array-like) country codes
+
+        Returns:
+            (tuple) arrays of sources, targets and weights
+        """
+        return self._induced_edges(self._positions(ccodes, strict=False))
+
+    def incident_edges(self, ccodes, direction='out'):
+        """
+        Edges leaving and/or entering the given countries.
+
+        Inputs:
+            - ccodes (array-like) country codes
+            - direction (str) 'out' for edges sent by ccodes, 'in' for edges
+                              received by ccodes, 'both' for the union
+
+        Returns:
+            (tuple) arrays of sources, targets and weights
+        """
+        _check_direction(direction)
+        rows = self._positions(ccodes, strict=False)
+        if direction != 'both':
+            return self._gather_edges(rows, direction)
+        out_edges = self._gather_edges(rows, 'out')
+        in_edges = self._gather_edges(rows, 'in')
+        # drop in-edges already counted as out-edges (both ends in ccodes)
+        keep = ~np.isin(in_edges[0], self.nodes[rows])
+        return tuple(np.concatenate([o, i[keep]])
+                     for o, i in zip(out_edges, in_edges))
+
+    def edges_between(self, group_a, group_b):
+        """
+        Edges sent by countries of group_a to countries of group_b.
+
+        Inputs:
+            - group_a (array-like) country codes of the senders
+            - group_b (array-like) country codes of the receivers
+
+        Returns:
+            (tuple) arrays of sources, targets and weights
+        """
+        sources, targets, weights = self.incident_edges(group_a, 'out')
+        mask = np.isin(targets, np.asarray(group_b))
+        return sources[mask], targets[mask], weights[mask]
+
+    def _positions(self, ccodes, strict=True):
+        """
+        Map country codes to rows of the index, raising a KeyError for
+        unknown countries when strict and dropping them otherwise.
+        """
+        ccodes = np.unique(np.asarray(ccodes, dtype=np.int64))
+        rows = np.searchsorted(self.nodes, ccodes)
+        rows[rows == len(self.nodes)] = 0
+        found = self.nodes[rows] == ccodes if len(self.nodes) else \
+            np.zeros(len(ccodes), dtype=bool)
+        if strict and not found.all():
+            raise KeyError(f"countries {ccodes[~found].tolist()} not in "
+                           f"the {self.year} diplomatic graph")
+        return rows[found]
+
+    def _neighbor_rows(self, rows, direction):
+        """
+        Sorted unique rows adjacent to the given rows.
+        """
+        _check_direction(direction)
+        if direction == 'both':
+            return np.union1d(self._neighbor_rows(rows, 'out'),
+                              self._neighbor_rows(rows, 'in'))
+        indptr, indices, _ = self._out if direction == 'out' else self._in
+        return np.unique(indices[_slice_positions(indptr, rows)])
+
+    def _gather_edges(self, rows, direction):
+        """
+        Edges stored in the given rows of the out or in CSR arrays.
+        """
+        indptr, indices, weights = self._out if direction == 'out' \
+            else self._in
+        positions = _slice_positions(indptr, rows)
+        owners = np.repeat(rows, indptr[rows + 1] - indptr[rows])
+        others = indices[positions]
+        if direction == 'out':
+            return self.nodes[owners], self.nodes[others], weights[positions]
+        return self.nodes[others], self.nodes[owners], weights[positions]
+
+    def _induced_edges(self, rows):
+        """
+        Edges between the given rows.
+        """
+        mask = np.zeros(len(self.nodes), dtype=bool)
+        mask[rows] = True
+        indptr, indices, weights = self._out
+        positions = _slice_positions(indptr, rows)
+        owners = np.repeat(rows, indptr[rows + 1] - indptr[rows])
+        inside = mask[indices[positions]]
+        positions, owners = positions[inside], owners[inside]
+        return (self.nodes[owners], self.nodes[indices[positions]],
+                weights[positions])
+
+
+def _check_direction(direction):
+    """
+    Raise a ValueError for unsupported edge directions.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction should be one of {DIRECTIONS}, "
+                         f"got {direction!r}")
+
+
+def _build_csr(rows, cols, weights, n_nodes):
+    """
+    Build CSR arrays (indptr, indices, weights) from an edge list of
+    row/column positions, with the columns of every row sorted.
+    """
+    order = np.lexsort((cols, rows))
+    counts = np.bincount(rows, minlength=n_nodes)
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, cols[order], weights[order]
+
+
+def _slice_positions(indptr, rows):
+    """
+    Positions in the CSR indices of all the entries of the given rows,
+    i.e. the concatenation of range(indptr[r], indptr[r + 1]) for r in rows.
+    """
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+
+
+def build_adjacency_indexes(conn):
+    """
+    Build the adjacency index of the diplomatic graph of every year
+    with a single pass over the diplomatic exchanges table.
+
+    The edges are the same as in get_diplomatic_graph.
+
+    Inputs:
+        - conn (sqlite3.Connection) connection to database
+
+    Returns:
+        (dict) mapping from year to AdjacencyIndex
+    """
+    q = f""" SELECT year, ccode1, ccode2, DR_at_2
+             FROM {DIPLOMATIC_DATA_TABLE_NAME} de
+             WHERE DE=1 AND DR_at_1 = 3 AND DR_at_2 != 9
+             ORDER BY year, rowid
+         """
+    cur = conn.cursor()
+    rows = cur.execute(q).fetchall()
+    cur.close()
+    if not rows:
+        return {}
+
+    years, sources, targets, weights = map(np.asarray, zip(*rows))
+    unique_years, starts = np.unique(years, return_index=True)
+    ends = np.append(starts[1:], len(years))
+    return {int(year): AdjacencyIndex(int(year), sources[start:end],
+                                      targets[start:end],
+                                      weights[start:end])
+            for year, start, end in zip(unique_years, starts, ends)}
+
+
+def neighbors_over_years(indexes, ccode, start_year, end_year,
+                         direction='out'):
+    """
+    Neighbors of a country over a range of years.
+
+    Years of the range missing from the indexes, or in which the country
+    does not appear, are skipped.
+
+    Inputs:
+        - indexes (dict) mapping from year to AdjacencyIndex
+        - ccode (int) country code
+        - start_year (int) first year of the range (inclusive)
+        - end_year (int) last year of the range (inclusive)
+        - direction (str) 'out', 'in' or 'both'
+
+    Returns:
+        (dict) mapping from year to sorted array of neighbor country codes
+    """
+    return {year: index.neighbors(ccode, direction)
+            for year, index in sorted(indexes.items())
+            if start_year <= year <= end_year and ccode in index}
+
+
+def top_k_nodes(df_centralities, measure, k):
+    """
+    Country codes of the k highest ranked countries according to a measure.
+
+    Inputs:
+        - df_centralities (pandas.DataFrame) centrality measures of a year
+                                             (see get_centrality_measures)
+        - measure (str) name of the centrality measure e.g. 'pagerank'
+        - k (int) number of countries
+
+    Returns:
+        (numpy.ndarray) country codes sorted by decreasing measure
+    """
+    sorted_measures = df_centralities.sort_values(measure, ascending=False,
+                                                  kind='stable')
+    return sorted_measures['node_id'].values[:k]
+
+
+def top_k_subgraph(index, df_centralities, measure, k, direction=None):
+    """
+    Subgraph of the k highest ranked countries according to a measure.
+
+    By default the subgraph is induced by the top k countries. If a direction
+    is given, it contains every edge leaving ('out'), entering ('in') or
+    touching ('both') the top k countries instead.
+
+    Inputs:
+        - index (AdjacencyIndex) adjacency index of the year
+        - df_centralities (pandas.DataFrame) centrality measures of the year
+        - measure (str) name of the centrality measure e.g. 'pagerank'
+        - k (int) number of countries
+        - direction (str) None, 'out', 'in' or 'both'
+
+    Returns:
+        (tuple) arrays of sources, targets and weights
+    """
+    top_nodes = top_k_nodes(df_centralities, measure, k)
+    if direction is None:
+        return index.induced_subgraph(top_nodes)
+    return index.incident_edges(top_nodes, direction)
+
+
+def edges_to_dataframe(edges):
+    """
+    Convert an edge array tuple to a dataframe.
+
+    Inputs:
+        - edges (tuple) arrays of sources, targets and weights
+
+    Returns:
+        (pandas.DataFrame) dataframe with columns ccode1, ccode2 and DR_at_2
+    """
+    import pandas as pd
+
+    sources, targets, weights = edges
+    return pd.DataFrame({'ccode1': sources, 'ccode2': targets,
+                         'DR_at_2': weights})
+
+
+def edges_to_graph(edges, nodes=None, labels=None):
+    """
+    Convert an edge array tuple to a directed networkx graph.
+
+    Inputs:
+        - edges (tuple) arrays of sources, targets and weights
+        - nodes (array-like) additional nodes to include e.g. all the nodes
+                             of an AdjacencyIndex
+        - labels (dict) optional mapping from country code to node label
+                        e.g. CODES_TO_COUNTRIES_DICT
+
+    Returns:
+        (nx.DiGraph) the graph with DR_at_2 edge attributes
+    """
+    import networkx as nx
+
+    G = nx.DiGraph()
+    if nodes is not None:
+        G.add_nodes_from(int(node) for node in nodes)
+    sources, targets, weights = edges
+    G.add_weighted_edges_from(zip(sources.tolist(), targets.tolist(),
+                                  weights.tolist()), weight='DR_at_2')
+    if labels is not None:
+        nx.set_node_attributes(G, {node: labels[node] for node in G.nodes
+                                   if node in labels}, name='label')
+    return G
@@ -0,0 +1,478 @@
+"""
+Local read-only HTTP/JSON query service over diplomatic.db.
+
+Endpoints (GET only, JSON responses):
+    /centralities?year=2005          centrality measures of all countries
+    /centralities?ccode=2            centrality measures of a country
+                                     for all years
+    /regression?year=2005            regression data (see
+        [&ccode=2][&columns=a,b]     get_data_for_regression), optionally
+                                     for one country and/or some columns
+    /edges?year=2005                 edge list of the diplomatic graph
+        [&ccode=2[&k=1][&direction=out]]
+                                     k-hop ego network of a country
+        [&top=10[&measure=pagerank][&direction=out]]
+                                     subgraph of the top countries by a
+                                     centrality measure (see top_k_subgraph)
+    /health                          liveness check
+
+Queries run on a pool of read-only sqlite connections in worker threads.
+Responses carry an ETag so that clients can revalidate with If-None-Match
+(304 Not Modified), and hot responses are kept in an in-process LRU cache.
+The database is assumed not to change while the service runs.
+
+Usage:
+    >> python query_service.py --port 8000
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import pathlib
+import queue
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from diplomatic_exchanges import DATABASE_NAME, get_centrality_measures, \
+    get_country_centrality_measures, get_data_for_regression
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CACHE_SIZE = 256
+
+# centrality measures that the top countries of /edges can be ranked by
+CENTRALITY_MEASURES = ('pagerank', 'eigenvector', 'katz', 'betweenness',
+                       'closeness', 'degree', 'in_degree', 'out_degree')
+
+# largest request head (request line and headers) accepted, in bytes
+MAX_HEAD_SIZE = 16 * 1024
+
+
+class QueryError(Exception):
+    """
+    Error raised by a query handler, mapped to an HTTP error response.
+    """
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of read-only sqlite connections shared by worker threads.
+    """
+
+    def __init__(self, database, size):
+        """
+        Open the connections of the pool.
+
+        Inputs:
+            - database (str) path to the sqlite database
+            - size (int) number of connections
+        """
+        path = pathlib.Path(database).resolve()
+        if not path.exists():
+            raise FileNotFoundError(f"database {path} does not exist, "
+                                    f"run main.py first")
+        uri = f"{path.as_uri()}?mode=ro"
+        self._connections = queue.Queue()
+        for _ in range(size):
+            self._connections.put(sqlite3.connect(uri, uri=True,
+                                                  check_same_thread=False))
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        Borrow a connection from the pool, blocking until one is free.
+        """
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        """
+        Close all the connections of the pool.
+        """
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+class LRUCache:
+    """
+    Least recently used cache of a bounded number of entries.
+    """
+
+    def __init__(self, maxsize):
+        """
+        Inputs:
+            - maxsize (int) maximum number of entries
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        Get the value of a key, or None if missing.
+        """
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def put(self, key, value):
+        """
+        Store the value of a key, evicting the least recently used entry
+        if the cache is full.
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _int_param(params, name, default=None):
+    """
+    Get an integer query parameter, raising a QueryError if it is missing
+    (and has no default) or not an integer.
+    """
+    if name not in params:
+        if default is None:
+            raise QueryError(f"missing query parameter '{name}'")
+        return default
+    try:
+        return int(params[name])
+    except ValueError:
+        raise QueryError(f"query parameter '{name}' should be an integer")
+
+
+def _etag_matches(if_none_match, etag):
+    """
+    Whether an If-None-Match header value (a list of possibly weak entity
+    tags, or *) matches an ETag.
+    """
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in [tag[2:] if tag.startswith('W/') else tag
+                                   for tag in tags]
+
+
+def _records_json(df):
+    """
+    Serialize a dataframe to a JSON list of records, keeping the first of
+    duplicated columns (e.g. the join keys of get_data_for_regression) and
+    dropping the internal "index" row ids of the database tables.
+    """
+    df = df.loc[:, ~df.columns.duplicated() & (df.columns != 'index')]
+    return df.to_json(orient='records')
+
+
+class QueryService:
+    """
+    Query handlers and cache of the service.
+    """
+
+    def __init__(self, database=DATABASE_NAME, pool_size=DEFAULT_POOL_SIZE,
+                 cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Inputs:
+            - database (str) path to the sqlite database
+            - pool_size (int) number of connections and worker threads
+            - cache_size (int) maximum number of cached responses
+        """
+        self.pool = ConnectionPool(database, pool_size)
+        self.cache = LRUCache(cache_size)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size)
+        self._pending = {}
+        self._adjacency_indexes = None
+        self._handlers = {'/centralities': self.centralities,
+                          '/regression': self.regression,
+                          '/edges': self.edges,
+                          '/health': self.health}
+
+    def close(self):
+        """
+        Stop the worker threads and close the connections.
+        """
+        self._executor.shutdown()
+        self.pool.close()
+
+    async def respond(self, target):
+        """
+        Get the JSON body and ETag for a request target, from the cache or
+        by running the query in a worker thread. Concurrent requests for the
+        same uncached target share a single query.
+
+        Inputs:
+            - target (str) request target e.g. /centralities?year=2005
+
+        Returns:
+            (tuple) the body (bytes) and its ETag (str)
+        """
+        url = urlsplit(target)
+        handler = self._handlers.get(url.path)
+        if handler is None:
+            raise QueryError(f"unknown path {url.path}", HTTPStatus.NOT_FOUND)
+        params = {name: values[-1]
+                  for name, values in parse_qs(url.query).items()}
+        key = (url.path, tuple(sorted(params.items())))
+
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+        if key in self._pending:
+            return await asyncio.shield(self._pending[key])
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._run, handler,
+                                      params)
+        self._pending[key] = future
+        try:
+            response = await asyncio.shield(future)
+        finally:
+            del self._pending[key]
+        self.cache.put(key, response)
+        return response
+
+    def _run(self, handler, params):
+        """
+        Run a handler with a pooled connection and build its response.
+        """
+        with self.pool.connection() as conn:
+            body = handler(conn, params).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        return body, etag
+
+    def centralities(self, conn, params):
+        """
+        Centrality measures by year or by country.
+        """
+        if 'ccode' in params:
+            ccode = _int_param(params, 'ccode')
+            return _records_json(get_country_centrality_measures(conn, ccode))
+        year = _int_param(params, 'year')
+        return _records_json(get_centrality_measures(year, conn))
+
+    def regression(self, conn, params):
+        """
+        Slice of the regression data of a year.
+        """
+        year = _int_param(params, 'year')
+        data = get_data_for_regression(conn, year)
+        data = data.loc[:, ~data.columns.duplicated()
+                        & (data.columns != 'index')]
+        if 'ccode' in params:
+            data = data[data['node_id'] == _int_param(params, 'ccode')]
+        if 'columns' in params:
+            columns = params['columns'].split(',')
+            unknown = [c for c in columns if c not in data.columns]
+            if unknown:
+                raise QueryError(f"unknown columns {unknown}")
+            data = data[['node_id', 'year']
+                        + [c for c in columns if c not in ('node_id', 'year')]]
+        return _records_json(data)
+
+    def edges(self, conn, params):
+        """
+        Edge list of the graph of a year, of an ego network or of the
+        subgraph of the top countries by a centrality measure.
+        """
+        from network_queries import build_adjacency_indexes, \
+            edges_to_dataframe, top_k_subgraph
+
+        year = _int_param(params, 'year')
+        # built once, workers may race to build it but the result is the same
+        if self._adjacency_indexes is None:
+            self._adjacency_indexes = build_adjacency_indexes(conn)
+        index = self._adjacency_indexes.get(year)
+        if index is None:
+            raise QueryError(f"no diplomatic graph for year {year}",
+                             HTTPStatus.NOT_FOUND)
+
+        try:
+            if 'ccode' in params:
+                ccode = _int_param(params, 'ccode')
+                k = _int_param(params, 'k', 1)
+                if k < 0:
+                    raise QueryError("query parameter 'k' should be >= 0")
+                try:
+                    edges = index.ego_network(
+                        ccode, k=k, direction=params.get('direction', 'out'))
+                except KeyError as e:  # country not in the graph
+                    raise QueryError(str(e).strip("'"), HTTPStatus.NOT_FOUND)
+            elif 'top' in params:
+                top = _int_param(params, 'top')
+                if top < 1:
+                    raise QueryError("query parameter 'top' should be >= 1")
+                measure = params.get('measure', 'pagerank')
+                if measure not in CENTRALITY_MEASURES:
+                    raise QueryError(f"unknown measure '{measure}', should "
+                                     f"be one of {CENTRALITY_MEASURES}")
+                edges = top_k_subgraph(index,
+                                       get_centrality_measures(year, conn),
+                                       measure, top,
+                                       direction=params.get('direction'))
+            else:
+                edges = index.edges()
+        except ValueError as e:  # unsupported direction
+            raise QueryError(str(e))
+        return _records_json(edges_to_dataframe(edges))
+
+    def health(self, conn, params):
+        """
+        Liveness check.
+        """
+        return json.dumps({'status': 'ok'})
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve the HTTP/1.1 requests of a client connection (with keep-alive).
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    error = QueryError(
+                        "request head too large",
+                        HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+                    await self._write_error(writer, error, keep_alive=False)
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ')
+                except ValueError:
+                    await self._write_error(
+                        writer, QueryError("malformed request line"),
+                        keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                # GET requests have no body, but discard one if sent
+                length = headers.get('content-length', '0')
+                if not length.isdigit():
+                    await self._write_error(
+                        writer, QueryError("malformed content-length"),
+                        keep_alive=False)
+                    break
+                if int(length):
+                    try:
+                        await reader.readexactly(int(length))
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' \
+                    else connection == 'keep-alive'
+
+                if method != 'GET':
+                    await self._write_error(
+                        writer, QueryError(f"method {method} not allowed",
+                                           HTTPStatus.METHOD_NOT_ALLOWED),
+                        keep_alive)
+                else:
+                    try:
+                        body, etag = await self.respond(target)
+                    except QueryError as e:
+                        await self._write_error(writer, e, keep_alive)
+                    except Exception as e:
+                        error = QueryError(f"{type(e).__name__}: {e}",
+                                           HTTPStatus.INTERNAL_SERVER_ERROR)
+                        await self._write_error(writer, error, keep_alive)
+                    else:
+                        if _etag_matches(headers.get('if-none-match'), etag):
+                            await self._write(writer, HTTPStatus.NOT_MODIFIED,
+                                              b'', etag, keep_alive)
+                        else:
+                            await self._write(writer, HTTPStatus.OK, body,
+                                              etag, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _write(self, writer, status, body, etag, keep_alive):
+        """
+        Write an HTTP response.
+        """
+        headers = [f"HTTP/1.1 {status.value} {status.phrase}",
+                   f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if status != HTTPStatus.NOT_MODIFIED:  # 304 responses have no body
+            headers += ["Content-Type: application/json",
+                        f"Content-Length: {len(body)}"]
+        if etag is not None:
+            headers += [f"ETag: {etag}", "Cache-Control: no-cache"]
+        head = "\r\n".join(headers) + "\r\n\r\n"
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _write_error(self, writer, error, keep_alive):
+        """
+        Write a JSON error response.
+        """
+        body = json.dumps({'error': str(error)}).encode()
+        await self._write(writer, error.status, body, None, keep_alive)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, database=DATABASE_NAME,
+                pool_size=DEFAULT_POOL_SIZE, cache_size=DEFAULT_CACHE_SIZE):
+    """
+    Run the query service until cancelled.
+
+    Inputs:
+        - host (str) interface to listen on
+        - port (int) port to listen on
+        - database (str) path to the sqlite database
+        - pool_size (int) number of connections and worker threads
+        - cache_size (int) maximum number of cached responses
+
+    Returns: None
+    """
+    service = QueryService(database, pool_size, cache_size)
+    server = await asyncio.start_server(service.handle_connection, host, port,
+                                        limit=MAX_HEAD_SIZE)
+    print(f"Serving {database} on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--database', default=DATABASE_NAME)
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.database,
+                          args.pool_size, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Startup benchmark for `import diplomatic_exchanges`.
+
+Times the import in fresh interpreters and compares it with the time it takes
+to import the heavy libraries the module used to load eagerly. Also checks
+that none of those libraries is loaded by the import itself.
+
+Usage:
+    >> python startup_benchmark.py
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+# libraries that should only be imported by the functions that need them
+HEAVY_MODULES = ['pandas', 'numpy', 'networkx', 'sklearn', 'jellyfish',
+                 'requests', 'bs4']
+
+# import time of the module should be at most this fraction of the time
+# needed to import the heavy libraries
+MAX_FRACTION = 0.1
+REPEATS = 5
+
+
+def time_statement(statement, repeats=REPEATS):
+    """
+    Median wall-clock time of running a statement in a fresh interpreter.
+
+    Inputs:
+        - statement (str) python code to run
+        - repeats (int) number of runs
+
+    Returns:
+        (float) the median time in seconds
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def loaded_heavy_modules():
+    """
+    Heavy libraries loaded as a side effect of importing diplomatic_exchanges.
+
+    Inputs: None
+
+    Returns:
+        (list) names of the loaded heavy libraries
+    """
+    statement = ("import sys, diplomatic_exchanges; "
+                 f"print(' '.join(m for m in {HEAVY_MODULES!r} "
+                 "if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', statement], check=True,
+                            capture_output=True, text=True)
+    return result.stdout.split()
+
+
+def main():
+    """
+    Run the benchmark and exit with a non-zero status if it fails.
+    """
+    available = []
+    for module in HEAVY_MODULES:
+        try:
+            __import__(module)
+            available.append(module)
+        except ImportError:
+            pass
+
+    baseline = time_statement('pass')
+    module_time = time_statement('import diplomatic_exchanges') - baseline
+    heavy_time = time_statement(
+        '; '.join(f'import {module}' for module in available)) - baseline
+
+    print(f"interpreter startup:            {baseline * 1e3:8.1f} ms")
+    print(f"import diplomatic_exchanges:    {module_time * 1e3:8.1f} ms")
+    print(f"import {', '.join(available)}: {heavy_time * 1e3:8.1f} ms")
+
+    failures = []
+    loaded = loaded_heavy_modules()
+    if loaded:
+        failures.append(f"heavy modules loaded at import: {loaded}")
+    if module_time > MAX_FRACTION * heavy_time:
+        failures.append(f"import takes more than {MAX_FRACTION:.0%} of the "
+                        f"time needed to import the heavy libraries")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()